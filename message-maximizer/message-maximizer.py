@@ -1,17 +1,49 @@
 import json
-import boto3
+import os
+import re
 import logging
-from typing import Dict, List, Tuple, Any
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Any
 
 # Set up logging
 logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+# LOG_LEVEL is case-insensitive; unknown names fall back to INFO rather than failing at import
+_LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').strip().upper()
+logger.setLevel(_LOG_LEVEL if isinstance(logging.getLevelName(_LOG_LEVEL), int) else logging.INFO)
 
-# Initialize boto3 client for End User Messaging SMS
-sms_client = boto3.client('pinpoint-sms-voice-v2')
+# Set LOG_EXC_INFO=1 to include full tracebacks in error logs
+_DEBUG_TRACE = os.environ.get('LOG_EXC_INFO', '0') == '1'
+
+# Client configuration: keep pooled HTTPS connections alive across warm
+# invocations and cap retries so a throttled send fails within the timeout
+_CLIENT_CONFIG = {
+    'max_pool_connections': 50,
+    'tcp_keepalive': True,
+    'retries': {'mode': 'standard', 'total_max_attempts': 3}
+}
+
+def _create_client(service_name: str) -> Any:
+    """Create a boto3 client with the shared configuration."""
+    # boto3/botocore are imported here rather than at module top so that
+    # dry-run-only containers never pay to load them
+    import boto3
+    from botocore.config import Config
+    return boto3.client(service_name, config=Config(**_CLIENT_CONFIG))
+
+# boto3 client for End User Messaging SMS, created on first send so that
+# dry-run invocations never pay for client construction
+_sms_client = None
+
+def get_sms_client() -> Any:
+    """Return the shared End User Messaging SMS client, creating it on first use."""
+    global _sms_client
+    if _sms_client is None:
+        _sms_client = _create_client('pinpoint-sms-voice-v2')
+    return _sms_client
 
 # GSM 03.38 character set
-GSM_BASIC_CHARS = set([
+GSM_BASIC_CHARS = frozenset((
     '@', '£', '$', '¥', 'è', 'é', 'ù', 'ì', 'ò', 'Ç', '\n', 'Ø', 'ø', '\r', 'Å', 'å',
     'Δ', '_', 'Φ', 'Γ', 'Λ', 'Ω', 'Π', 'Ψ', 'Σ', 'Θ', 'Ξ', '\x1B', 'Æ', 'æ', 'ß', 'É',
     ' ', '!', '"', '#', '¤', '%', '&', "'", '(', ')', '*', '+', ',', '-', '.', '/',
@@ -20,16 +52,16 @@ GSM_BASIC_CHARS = set([
     'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z', 'Ä', 'Ö', 'Ñ', 'Ü', '§',
     '¿', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o',
     'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z', 'ä', 'ö', 'ñ', 'ü', 'à'
-])
+))
 
 # GSM extended characters (require escape sequence)
-GSM_EXTENDED_CHARS = set([
+GSM_EXTENDED_CHARS = frozenset((
     '\f', '^', '{', '}', '\\', '[', '~', ']', '|', '€'
-])
+))
 
 # Unicode characters to preserve (won't be converted even though they force UCS-2)
 # These are characters you want to keep for brand/marketing reasons despite higher cost
-PRESERVE_UNICODE_CHARS = set([
+PRESERVE_UNICODE_CHARS = frozenset((
     '🚀',  # rocket emoji
     '💰',  # money bag emoji
     '⭐',  # star
@@ -41,7 +73,7 @@ PRESERVE_UNICODE_CHARS = set([
     '❌',  # cross mark
     '⚡',  # lightning
     # Add more characters you want to preserve here
-])
+))
 
 # Unicode to GSM character mapping (comprehensive - includes all Twilio mappings + extras)
 UNICODE_TO_GSM_MAP = {
@@ -326,38 +358,132 @@ UNICODE_TO_GSM_MAP = {
     '\u00B1': '+/-'   # ± plus-minus
 }
 
+def _build_gsm_bitmap() -> bytes:
+    """Build a bitmap with one bit set per GSM code point in the BMP."""
+    bitmap = bytearray(0x10000 >> 3)
+    for char in GSM_BASIC_CHARS | GSM_EXTENDED_CHARS:
+        codepoint = ord(char)
+        bitmap[codepoint >> 3] |= 1 << (codepoint & 7)
+    return bytes(bitmap)
+
+_GSM_BITMAP = _build_gsm_bitmap()
+
 def is_gsm_character(char: str) -> bool:
     """Check if a character is valid in GSM 03.38 character set."""
-    return char in GSM_BASIC_CHARS or char in GSM_EXTENDED_CHARS
+    if len(char) != 1:
+        return False
+    codepoint = ord(char)
+    return codepoint < 0x10000 and bool(_GSM_BITMAP[codepoint >> 3] & (1 << (codepoint & 7)))
+
+# Bound once to skip the module attribute lookup in the fallback path
+_normalize = unicodedata.normalize
+_combining = unicodedata.combining
+
+def _fallback_replacement(char: str) -> str:
+    """Find a reasonable GSM alternative for an unmapped Unicode character."""
+    try:
+        normalized = _normalize('NFD', char)
+        ascii_char = ''.join(c for c in normalized if not _combining(c))
+        if ascii_char != char and is_gsm_character(ascii_char):
+            return ascii_char
+    except Exception:
+        pass
+    # If no mapping found (or normalization fails), replace with '?'
+    return '?'
 
-def truncate_message_to_segments(message: str, max_segments: int) -> str:
-    """Truncate message to fit within specified segment count."""
-    if max_segments == 1:
-        max_chars = 160
+class _GsmTranslationTable(dict):
+    """Table mapping code points to their GSM replacement.
+    
+    GSM characters map to themselves and mapped characters to their
+    replacement; anything else is resolved on first use. Only NFD hits are
+    memoized (a few hundred code points at most) - '?' results are not, so
+    arbitrary caller input cannot grow the table without bound.
+    """
+    
+    def __init__(self, preserve_emojis: bool = False):
+        super().__init__((ord(k), v) for k, v in UNICODE_TO_GSM_MAP.items())
+        if preserve_emojis:
+            self.update((ord(c), c) for c in PRESERVE_UNICODE_CHARS if len(c) == 1)
+        self.update((ord(c), c) for c in GSM_BASIC_CHARS | GSM_EXTENDED_CHARS)
+    
+    def __missing__(self, codepoint: int) -> str:
+        replacement = _fallback_replacement(chr(codepoint))
+        if replacement != '?':
+            self[codepoint] = replacement
+        return replacement
+
+# One table per preserve_emojis setting, built once per Lambda container and
+# reused (along with any memoized NFD fallbacks) by every warm invocation
+_TRANSLATION_TABLE = _GsmTranslationTable()
+_PRESERVE_TRANSLATION_TABLE = _GsmTranslationTable(preserve_emojis=True)
+
+# ASCII characters outside the GSM 03.38 character set (grave accent and most controls)
+_ASCII_NON_GSM_CHARS = frozenset(chr(c) for c in range(128)) - GSM_BASIC_CHARS - GSM_EXTENDED_CHARS
+
+# Matches any non-ASCII character
+_NON_ASCII_PATTERN = re.compile(r'[^\x00-\x7f]')
+
+# Extended characters as a tuple for counting with str.count
+_GSM_EXTENDED_TUPLE = tuple(GSM_EXTENDED_CHARS)
+
+# Matches any character outside the GSM 03.38 basic and extended sets
+_NON_GSM_PATTERN = re.compile(
+    '[^' + re.escape(''.join(sorted(GSM_BASIC_CHARS | GSM_EXTENDED_CHARS))) + ']'
+)
+
+def truncate_message_to_segments(message: str, max_segments: int) -> Tuple[str, int, str]:
+    """Truncate message to fit within specified segment count.
+    
+    Returns the (possibly truncated) message with its segment count and encoding.
+    """
+    segments, encoding = calculate_segments(message)
+    if segments <= max_segments:
+        return message, segments, encoding
+    
+    # Capacity in the same units calculate_segments counts: GSM-7 septets or
+    # UCS-2 characters (multi-part segments lose room to the concatenation header)
+    if encoding == 'GSM-7':
+        capacity = 160 if max_segments == 1 else max_segments * 153
     else:
-        # First segment: 160 chars, subsequent segments: 153 chars each
-        max_chars = 160 + (max_segments - 1) * 153
+        capacity = 70 if max_segments == 1 else max_segments * 67
+    budget = capacity - 3  # Leave room for "..."
     
-    if len(message) <= max_chars:
-        return message
+    if encoding == 'GSM-7' and not GSM_EXTENDED_CHARS.isdisjoint(message[:budget]):
+        # Extended characters take two septets, so walk to the last one that fits
+        used = 0
+        max_chars = len(message)
+        for index, char in enumerate(message):
+            used += 2 if char in GSM_EXTENDED_CHARS else 1
+            if used > budget:
+                max_chars = index
+                break
+    else:
+        max_chars = budget
     
     # Smart truncation at word boundary
-    truncated = message[:max_chars-3]  # Leave room for "..."
+    truncated = message[:max_chars]
     
     # Find last space to avoid cutting words
     last_space = truncated.rfind(' ')
     if last_space > max_chars * 0.8:  # Only use word boundary if it's not too far back
         truncated = truncated[:last_space]
     
-    return truncated + "..."
+    truncated += "..."
+    return (truncated, *calculate_segments(truncated))
 
-def convert_to_gsm(message: str, preserve_emojis: bool = False, max_segments: int = None) -> Dict[str, Any]:
-    """Convert Unicode characters to GSM-compatible alternatives."""
+def convert_to_gsm(message: str, preserve_emojis: bool = False, max_segments: Optional[int] = None,
+                   track_replacements: bool = True) -> Dict[str, Any]:
+    """Convert Unicode characters to GSM-compatible alternatives.
+    
+    With track_replacements=False the per-character replacement records are
+    skipped; 'has_replacements' still reports whether anything was replaced.
+    'segments' and 'encoding' describe the returned message.
+    """
     
     # If max_segments is specified, first check if we can preserve all Unicode
     if max_segments is not None:
         # Calculate segments if we keep all Unicode characters (UCS-2 encoding)
-        original_segments, _ = calculate_segments(message)
+        original_segments, original_encoding = calculate_segments(message)
         
         if original_segments <= max_segments:
             # We can afford to keep all Unicode characters
@@ -372,77 +498,69 @@ def convert_to_gsm(message: str, preserve_emojis: bool = False, max_segments: in
                 }],
                 'original_length': len(message),
                 'converted_length': len(message),
+                'has_replacements': True,
+                'segments': original_segments,
+                'encoding': original_encoding,
                 'auto_preserved': True,
                 'segments_if_preserved': original_segments,
                 'max_segments_allowed': max_segments
             }
     
-    converted_message = ""
-    replacements = []
-    
-    for i, char in enumerate(message):
-        if is_gsm_character(char):
-            converted_message += char
-        elif preserve_emojis and char in PRESERVE_UNICODE_CHARS:
-            # Keep this Unicode character even though it forces UCS-2 encoding
-            converted_message += char
-            replacements.append({
-                'original': char,
-                'replacement': char,
-                'position': i,
-                'preserved': True,
-                'note': 'Preserved Unicode character (forces UCS-2 encoding)'
-            })
-        elif char in UNICODE_TO_GSM_MAP:
-            replacement = UNICODE_TO_GSM_MAP[char]
-            converted_message += replacement
-            replacements.append({
-                'original': char,
-                'replacement': replacement,
-                'position': i
-            })
-        else:
-            # For unmapped Unicode characters, try to find a reasonable ASCII alternative
-            import unicodedata
-            try:
-                normalized = unicodedata.normalize('NFD', char)
-                ascii_char = ''.join(c for c in normalized if not unicodedata.combining(c))
-                if ascii_char != char and is_gsm_character(ascii_char):
-                    converted_message += ascii_char
+    if message.isascii() and _ASCII_NON_GSM_CHARS.isdisjoint(message):
+        # Pure GSM ASCII (the common case) needs no conversion at all
+        converted_message = message
+        replacements = []
+        has_replacements = False
+    else:
+        table = _PRESERVE_TRANSLATION_TABLE if preserve_emojis else _TRANSLATION_TABLE
+        replacements = []
+        
+        def replace(match):
+            char = match.group()
+            replacement = table[ord(char)]
+            if track_replacements:
+                if replacement == char:
+                    # Only preserved characters map to themselves outside the GSM set
                     replacements.append({
                         'original': char,
-                        'replacement': ascii_char,
-                        'position': i
+                        'replacement': char,
+                        'position': match.start(),
+                        'preserved': True,
+                        'note': 'Preserved Unicode character (forces UCS-2 encoding)'
                     })
                 else:
-                    # If no mapping found, replace with '?'
-                    converted_message += '?'
                     replacements.append({
                         'original': char,
-                        'replacement': '?',
-                        'position': i
+                        'replacement': replacement,
+                        'position': match.start()
                     })
-            except:
-                # If normalization fails, replace with '?'
-                converted_message += '?'
-                replacements.append({
-                    'original': char,
-                    'replacement': '?',
-                    'position': i
-                })
+            return replacement
+        
+        # The regex engine skips over GSM characters in C; only the (usually
+        # few) non-GSM characters reach Python
+        converted_message, replaced_count = _NON_GSM_PATTERN.subn(replace, message)
+        has_replacements = replaced_count > 0
+    
+    if max_segments is not None and not has_replacements:
+        # Unchanged message - reuse the preservation check's count
+        converted_segments, converted_encoding = original_segments, original_encoding
+    else:
+        converted_segments, converted_encoding = calculate_segments(converted_message)
     
     result = {
         'converted_message': converted_message,
         'replacements': replacements,
         'original_length': len(message),
         'converted_length': len(converted_message),
+        'has_replacements': has_replacements,
+        'segments': converted_segments,
+        'encoding': converted_encoding,
         'auto_preserved': False
     }
     
     # If max_segments was specified, add analysis info
+    # (original_segments was already computed by the preservation check above)
     if max_segments is not None:
-        converted_segments, _ = calculate_segments(converted_message)
-        original_segments, _ = calculate_segments(message)
         result.update({
             'segments_if_preserved': original_segments,
             'segments_after_conversion': converted_segments,
@@ -452,14 +570,10 @@ def convert_to_gsm(message: str, preserve_emojis: bool = False, max_segments: in
     
     return result
 
-def calculate_segments(message: str) -> tuple:
+def calculate_segments(message: str) -> Tuple[int, str]:
     """Calculate SMS segment count and determine encoding type."""
     # Check if message contains any Unicode characters (including preserved ones)
-    has_unicode = False
-    try:
-        message.encode('ascii')
-    except UnicodeEncodeError:
-        has_unicode = True
+    has_unicode = not message.isascii()
     
     if has_unicode:
         # UCS-2 encoding (Unicode)
@@ -470,13 +584,8 @@ def calculate_segments(message: str) -> tuple:
             segments = (length + 66) // 67  # 67 chars per segment for multi-part UCS-2
         encoding = 'UCS-2 (Unicode)'
     else:
-        # GSM-7 encoding
-        length = 0
-        for char in message:
-            if char in GSM_EXTENDED_CHARS:
-                length += 2  # Extended characters require escape sequence
-            else:
-                length += 1
+        # GSM-7 encoding - extended characters require an escape sequence
+        length = len(message) + sum(message.count(char) for char in _GSM_EXTENDED_TUPLE)
         
         if length <= 160:
             segments = 1
@@ -486,9 +595,178 @@ def calculate_segments(message: str) -> tuple:
     
     return segments, encoding
 
-def lambda_handler(event, context):
+# Response headers shared by every API Gateway response
+_CORS_JSON_HEADERS = {
+    'Content-Type': 'application/json; charset=utf-8',
+    'Access-Control-Allow-Origin': '*'
+}
+
+def _json_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an API Gateway proxy response with a JSON body."""
+    return {
+        'statusCode': status_code,
+        'headers': _CORS_JSON_HEADERS,
+        # Compact and unescaped: non-ASCII text stays 2-4 bytes instead of 6-12
+        'body': json.dumps(body, separators=(',', ':'), ensure_ascii=False)
+    }
+
+# Worker threads for phoneNumbers batch sends (fits within max_pool_connections)
+_SEND_WORKERS = 20
+
+# Largest phoneNumbers list sent directly; bigger fan-outs must use mode 'queue'
+# so a Lambda timeout cannot cut a batch off partway through
+_MAX_BATCH_RECIPIENTS = 100
+
+def _send_one(sms_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Send one SMS of a batch and return its per-recipient result."""
+    phone_number = sms_params['DestinationPhoneNumber']
+    try:
+        send_result = get_sms_client().send_text_message(**sms_params)
+    except Exception as error:
+        logger.error('SMS send failed for %s: %s', phone_number, error)
+        return {'phone_number': phone_number, 'error': str(error)}
+    return {'phone_number': phone_number, 'message_id': send_result['MessageId']}
+
+# SQS queue for the 'queue' delivery mode; a Lambda subscribed to it drains it
+_SMS_QUEUE_URL = os.environ.get('SMS_QUEUE_URL')
+
+# SendMessageBatch accepts at most 10 entries per call
+_SQS_BATCH_SIZE = 10
+
+# Largest phoneNumbers list queued in one request (50 SendMessageBatch calls),
+# so the enqueue loop finishes well within the Lambda timeout
+_MAX_QUEUE_RECIPIENTS = 500
+
+_sqs_client = None
+
+def get_sqs_client() -> Any:
+    """Return the shared SQS client, creating it on first use."""
+    global _sqs_client
+    if _sqs_client is None:
+        _sqs_client = _create_client('sqs')
+    return _sqs_client
+
+def _queue_messages(batch_params: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Enqueue send_text_message parameters in batches of 10 and return per-recipient results."""
+    sqs_client = get_sqs_client()
+    results = []
+    
+    for start in range(0, len(batch_params), _SQS_BATCH_SIZE):
+        chunk = batch_params[start:start + _SQS_BATCH_SIZE]
+        numbers = [params['DestinationPhoneNumber'] for params in chunk]
+        # A failed call only fails its own chunk; earlier chunks are already
+        # queued, so the caller needs to know exactly which numbers were not
+        try:
+            response = sqs_client.send_message_batch(
+                QueueUrl=_SMS_QUEUE_URL,
+                Entries=[{'Id': str(i), 'MessageBody': json.dumps(params)} for i, params in enumerate(chunk)]
+            )
+        except Exception as error:
+            logger.error('Failed to queue SMS for %d recipients: %s', len(chunk), error)
+            results.extend({'phone_number': number, 'error': str(error)} for number in numbers)
+            continue
+        
+        # Map each entry Id (its index in the chunk) back to its recipient
+        chunk_results = [{'phone_number': number, 'error': 'not acknowledged by SQS'} for number in numbers]
+        for entry in response.get('Successful', []):
+            index = int(entry['Id'])
+            chunk_results[index] = {'phone_number': numbers[index], 'message_id': entry['MessageId']}
+        for failure in response.get('Failed', []):
+            index = int(failure['Id'])
+            logger.error('Failed to queue SMS for %s: %s', numbers[index], failure.get('Message'))
+            chunk_results[index] = {'phone_number': numbers[index], 'error': failure.get('Message') or failure.get('Code')}
+        results.extend(chunk_results)
+    
+    return results
+
+def _drain_queue(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Send SMS messages queued by the 'queue' delivery mode (SQS event source)."""
+    failures = []
+    for record in records:
+        # Each record succeeds or fails on its own so SQS only redelivers the
+        # failed ones - never messages from this batch that were already sent
+        try:
+            sms_params = json.loads(record['body'])
+            if not isinstance(sms_params, dict):
+                raise ValueError('queued message body is not a JSON object')
+            failed = 'error' in _send_one(sms_params)
+        except Exception as error:
+            logger.error('Invalid queued message %s: %s', record.get('messageId'), error)
+            failed = True
+        if failed:
+            failures.append({'itemIdentifier': record['messageId']})
+    
+    logger.info('Drained %d queued messages, %d failed', len(records), len(failures))
+    return {'batchItemFailures': failures}
+
+def _deliver_queued(sms_params: Dict[str, Any], recipients: List[str], analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Enqueue the message for each recipient in SQS for a later drain."""
+    if not _SMS_QUEUE_URL:
+        # Deployment problem, not a caller error
+        error_body = {
+            'error': 'SMS_QUEUE_URL environment variable is required for queue mode',
+            'error_type': 'ConfigurationError',
+            'action': 'error'
+        }
+        logger.error('Configuration error: %s', error_body['error'])
+        return _json_response(500, error_body)
+    
+    batch_params = [{**sms_params, 'DestinationPhoneNumber': number} for number in recipients]
+    results = _queue_messages(batch_params)
+    
+    queued_count = sum(1 for result in results if 'message_id' in result)
+    logger.info('Queued %d of %d messages', queued_count, len(results))
+    
+    analysis_result['action'] = 'messages_queued'
+    analysis_result['queued_count'] = queued_count
+    analysis_result['failed_count'] = len(results) - queued_count
+    analysis_result['results'] = results
+    return _json_response(200, analysis_result)
+
+def _deliver_batch(sms_params: Dict[str, Any], recipients: List[str], analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Send the message to every recipient concurrently."""
+    logger.info('Sending SMS to %d recipients via AWS End User Messaging... Message length: %d chars',
+                len(recipients), len(sms_params['MessageBody']))
+    
+    # Create the shared client before fanning out so workers never race to build it
+    get_sms_client()
+    batch_params = [{**sms_params, 'DestinationPhoneNumber': number} for number in recipients]
+    with ThreadPoolExecutor(max_workers=min(_SEND_WORKERS, len(batch_params))) as executor:
+        results = list(executor.map(_send_one, batch_params))
+    
+    sent_count = sum(1 for result in results if 'message_id' in result)
+    logger.info('Batch send complete: %d of %d sent', sent_count, len(results))
+    
+    analysis_result['action'] = 'messages_sent'
+    analysis_result['sent_count'] = sent_count
+    analysis_result['failed_count'] = len(results) - sent_count
+    analysis_result['results'] = results
+    return _json_response(200, analysis_result)
+
+def _deliver_direct(sms_params: Dict[str, Any], analysis_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Send the message to a single recipient and return its message ID."""
+    logger.info('Sending SMS via AWS End User Messaging... Message length: %d chars', len(sms_params['MessageBody']))
+    
+    # Send the SMS (using the processed message - converted or original)
+    send_result = get_sms_client().send_text_message(**sms_params)
+    message_id = send_result['MessageId']
+    
+    logger.info('SMS sent successfully: %s', message_id)
+    
+    analysis_result['message_id'] = message_id
+    return _json_response(200, analysis_result)
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """AWS Lambda handler function."""
-    logger.info(f'Lambda function invoked with event: {json.dumps(event)}')
+    if logger.isEnabledFor(logging.DEBUG):
+        # Full event dump (phone numbers, message body) only at LOG_LEVEL=DEBUG
+        logger.debug('Lambda function invoked with event: %s', json.dumps(event))
+    
+    # SQS event source: send messages queued by the 'queue' delivery mode
+    records = event.get('Records')
+    if records and isinstance(records, list) and all(
+            isinstance(record, dict) and record.get('eventSource') == 'aws:sqs' for record in records):
+        return _drain_queue(records)
     
     try:
         # Handle both direct invocation and API Gateway events
@@ -499,6 +777,7 @@ def lambda_handler(event, context):
         
         # Extract parameters
         phone_number = request_body.get('phoneNumber')
+        phone_numbers = request_body.get('phoneNumbers')  # Batch send to several recipients
         message = request_body.get('message')
         origination_number = request_body.get('originationNumber')
         configuration_set_name = request_body.get('configurationSetName')
@@ -507,25 +786,50 @@ def lambda_handler(event, context):
         preserve_emojis = request_body.get('preserveEmojis', False)
         max_segments = request_body.get('maxSegments', None)  # Auto-preserve if under this limit
         segment_limit_action = request_body.get('segmentLimitAction', 'warn')  # 'reject', 'truncate', 'warn'
+        include_replacement_details = request_body.get('includeReplacementDetails', True)  # Ignored for dry runs
+        delivery_mode = request_body.get('mode', 'direct')  # 'direct' or 'queue'
         
         # Validate required parameters
-        if not phone_number or not message:
-            error_response = {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': 'phoneNumber and message are required parameters',
-                    'action': 'validation_error'
-                })
+        if delivery_mode not in ('direct', 'queue'):
+            error_body = {
+                'error': f'mode must be "direct" or "queue", got {delivery_mode!r}',
+                'action': 'validation_error'
             }
-            logger.error(f'Validation error: {error_response["body"]}')
-            return error_response
+            logger.error('Validation error: %s', error_body['error'])
+            return _json_response(400, error_body)
         
-        logger.info(f'Processing message for {phone_number}: "{message}"')
-        logger.info(f'Conversion enabled: {enable_conversion}')
+        if not (phone_number or phone_numbers) or not message:
+            error_body = {
+                'error': 'phoneNumber and message are required parameters',
+                'action': 'validation_error'
+            }
+            logger.error('Validation error: %s', error_body['error'])
+            return _json_response(400, error_body)
+        
+        if phone_numbers is not None:
+            if not isinstance(phone_numbers, list) or not all(
+                    isinstance(number, str) and number for number in phone_numbers):
+                error_body = {
+                    'error': 'phoneNumbers must be a list of non-empty phone number strings',
+                    'action': 'validation_error'
+                }
+                logger.error('Validation error: %s', error_body['error'])
+                return _json_response(400, error_body)
+            
+            if delivery_mode == 'queue':
+                max_recipients, limit_hint = _MAX_QUEUE_RECIPIENTS, 'can be queued per request - split larger fan-outs'
+            else:
+                max_recipients, limit_hint = _MAX_BATCH_RECIPIENTS, 'can be sent directly - use mode "queue" for larger fan-outs'
+            if len(phone_numbers) > max_recipients:
+                error_body = {
+                    'error': f'phoneNumbers has {len(phone_numbers)} entries; at most {max_recipients} {limit_hint}',
+                    'action': 'validation_error'
+                }
+                logger.error('Validation error: %s', error_body['error'])
+                return _json_response(400, error_body)
+        
+        logger.info('Processing message for %s: "%s"', phone_numbers or phone_number, message)
+        logger.info('Conversion enabled: %s', enable_conversion)
         
         if not enable_conversion:
             # Skip conversion - use original message and calculate UCS-2 segments
@@ -533,19 +837,12 @@ def lambda_handler(event, context):
                 'converted_message': message,
                 'replacements': [],
                 'original_length': len(message),
-                'converted_length': len(message)
+                'converted_length': len(message),
+                'has_replacements': False
             }
             
             # Check if message actually contains Unicode characters
-            has_unicode = False
-            unicode_chars = []
-            try:
-                message.encode('ascii')
-            except UnicodeEncodeError:
-                has_unicode = True
-                for i, char in enumerate(message):
-                    if ord(char) > 127:
-                        unicode_chars.append({'char': char, 'code': ord(char), 'position': i})
+            has_unicode = not message.isascii()
             
             # Calculate segments based on encoding
             message_length = len(message)
@@ -565,40 +862,39 @@ def lambda_handler(event, context):
                     segments = (message_length + 152) // 153
                 encoding_type = 'GSM-7 (ASCII only)'
             
-            logger.info(f'Unicode detection: {has_unicode}, Unicode chars: {unicode_chars}')
+            if logger.isEnabledFor(logging.INFO):
+                # Purely diagnostic, so only collect the characters when they are logged
+                unicode_chars = [
+                    {'char': match.group(), 'code': ord(match.group()), 'position': match.start()}
+                    for match in _NON_ASCII_PATTERN.finditer(message)
+                ] if has_unicode else []
+                logger.info('Unicode detection: %s, Unicode chars: %s', has_unicode, unicode_chars)
         else:
             # Convert Unicode characters to GSM alternatives
-            conversion = convert_to_gsm(message, preserve_emojis, max_segments)
-            segments, encoding_type = calculate_segments(conversion['converted_message'])
+            conversion = convert_to_gsm(message, preserve_emojis, max_segments,
+                                        track_replacements=dry_run or include_replacement_details)
+            segments, encoding_type = conversion['segments'], conversion['encoding']
             
             # Handle segment limit enforcement if maxSegments is specified
             if max_segments is not None and segments > max_segments:
                 if segment_limit_action == 'reject':
-                    error_response = {
-                        'statusCode': 400,
-                        'headers': {
-                            'Content-Type': 'application/json',
-                            'Access-Control-Allow-Origin': '*'
-                        },
-                        'body': json.dumps({
-                            'error': f'Message exceeds segment limit: {segments} segments > {max_segments} allowed',
-                            'action': 'segment_limit_exceeded',
-                            'current_segments': segments,
-                            'max_segments_allowed': max_segments,
-                            'message_length': len(conversion['converted_message']),
-                            'encoding': encoding_type
-                        })
+                    error_body = {
+                        'error': f'Message exceeds segment limit: {segments} segments > {max_segments} allowed',
+                        'action': 'segment_limit_exceeded',
+                        'current_segments': segments,
+                        'max_segments_allowed': max_segments,
+                        'message_length': len(conversion['converted_message']),
+                        'encoding': encoding_type
                     }
-                    logger.error(f'Message rejected - segment limit exceeded: {error_response["body"]}')
-                    return error_response
+                    logger.error('Message rejected - segment limit exceeded: %d segments > %s allowed', segments, max_segments)
+                    return _json_response(400, error_body)
                 
                 elif segment_limit_action == 'truncate':
                     # Truncate the converted message to fit segment limit
                     original_message = conversion['converted_message']
-                    truncated_message = truncate_message_to_segments(original_message, max_segments)
-                    
-                    # Recalculate segments after truncation
-                    new_segments, new_encoding = calculate_segments(truncated_message)
+                    truncated_message, new_segments, new_encoding = truncate_message_to_segments(
+                        original_message, max_segments
+                    )
                     
                     # Update conversion result
                     conversion['converted_message'] = truncated_message
@@ -610,18 +906,21 @@ def lambda_handler(event, context):
                     segments = new_segments
                     encoding_type = new_encoding
                     
-                    logger.info(f'Message truncated from {len(original_message)} to {len(truncated_message)} characters to fit {max_segments} segments')
+                    logger.info('Message truncated from %d to %d characters to fit %s segments',
+                                len(original_message), len(truncated_message), max_segments)
                 
                 # For 'warn' action, we just continue and add warning to response
         
-        logger.info(f'Message processing complete. Original length: {conversion["original_length"]}, '
-                   f'Final length: {conversion["converted_length"]}, Segments: {segments}, Encoding: {encoding_type}')
+        logger.info('Message processing complete. Original length: %d, Final length: %d, Segments: %d, Encoding: %s',
+                    conversion['original_length'], conversion['converted_length'], segments, encoding_type)
         
+        # Response fields are added in place below; 'action' leads so it stays first in the JSON
         analysis_result = {
+            'action': 'analysis_only' if dry_run else 'message_sent',
             'original': {
                 'message': message,
                 'length': conversion['original_length'],
-                'has_unicode_chars': len(conversion['replacements']) > 0
+                'has_unicode_chars': conversion['has_replacements']
             },
             'processed': {
                 'message': conversion['converted_message'],
@@ -655,96 +954,51 @@ def lambda_handler(event, context):
         # If dry run mode, return analysis without sending SMS
         if dry_run:
             logger.info('Dry run mode - returning analysis only')
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'action': 'analysis_only',
-                    **analysis_result
-                })
-            }
+            return _json_response(200, analysis_result)
         
         # Validate SMS sending parameters
         if not origination_number:
-            error_response = {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': 'originationNumber is required for sending SMS',
-                    'action': 'validation_error'
-                })
+            error_body = {
+                'error': 'originationNumber is required for sending SMS',
+                'action': 'validation_error'
             }
-            logger.error(f'SMS validation error: {error_response["body"]}')
-            return error_response
-        
-        # Prepare SMS parameters
-        sms_params = {
-            'DestinationPhoneNumber': phone_number,
-            'MessageBody': conversion['converted_message'],
-            'OriginationIdentity': origination_number
-        }
-        
-        # Add configuration set if provided
-        if configuration_set_name:
-            sms_params['ConfigurationSetName'] = configuration_set_name
+            logger.error('SMS validation error: %s', error_body['error'])
+            return _json_response(400, error_body)
         
-        # Validate message length before sending
+        # Validate message length before building the request
         message_to_send = conversion['converted_message']
-        if len(message_to_send) > 1600:  # AWS SMS limit is typically 1600 chars
-            error_response = {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': f'Message too long: {len(message_to_send)} characters. AWS SMS limit is 1600 characters.',
-                    'action': 'validation_error',
-                    'message_length': len(message_to_send),
-                    'segments': segments
-                })
+        msg_len = len(message_to_send)
+        if msg_len > 1600:  # AWS SMS limit is typically 1600 chars
+            error_body = {
+                'error': f'Message too long: {msg_len} characters. AWS SMS limit is 1600 characters.',
+                'action': 'validation_error',
+                'message_length': msg_len,
+                'segments': segments
             }
-            logger.error(f'Message too long: {error_response["body"]}')
-            return error_response
-        
-        logger.info(f'Sending SMS via AWS End User Messaging... Message length: {len(message_to_send)} chars')
-        
-        # Send the SMS (using the processed message - converted or original)
-        send_result = sms_client.send_text_message(**sms_params)
-        
-        logger.info(f'SMS sent successfully: {send_result["MessageId"]}')
+            logger.error('Message too long: %d characters, %d segments', msg_len, segments)
+            return _json_response(400, error_body)
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'action': 'message_sent',
-                'message_id': send_result['MessageId'],
-                **analysis_result
-            })
+        # Prepare SMS parameters (configuration set only if provided)
+        sms_params = {
+            'DestinationPhoneNumber': phone_number,
+            'MessageBody': message_to_send,
+            'OriginationIdentity': origination_number,
+            **({'ConfigurationSetName': configuration_set_name} if configuration_set_name else {})
         }
         
+        # Hand off to the delivery path: SQS queue, concurrent batch, or a single direct send
+        if delivery_mode == 'queue':
+            return _deliver_queued(sms_params, phone_numbers or [phone_number], analysis_result)
+        if phone_numbers:
+            return _deliver_batch(sms_params, phone_numbers, analysis_result)
+        return _deliver_direct(sms_params, analysis_result)
+        
     except Exception as error:
-        logger.error(f'Lambda execution error: {str(error)}', exc_info=True)
+        error_message = str(error)
+        logger.error('Lambda execution error: %s', error_message, exc_info=_DEBUG_TRACE)
         
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'error': str(error),
-                'error_type': type(error).__name__,
-                'action': 'error'
-            })
-        }
\ No newline at end of file
+        return _json_response(500, {
+            'error': error_message,
+            'error_type': type(error).__name__,
+            'action': 'error'
+        })
\ No newline at end of file
@@ -1,63 +1,137 @@
 import boto3
-import uuid
+import os
 import json
+import re
 import time
-from typing import Dict, Any, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+from typing import Dict, Any, List, Tuple
+
+# AWS SMS Voice v2 client, created once per container and reused by warm invocations
+_SMS_VOICE_CLIENT = boto3.client(
+    'pinpoint-sms-voice-v2',
+    config=Config(
+        retries={'mode': 'adaptive', 'max_attempts': 5},
+        tcp_keepalive=True,
+        connect_timeout=2,
+        read_timeout=10,
+        max_pool_connections=20
+    )
+)
+
+# Rate limiting: start at most 1 request per second, but let slow calls overlap
+_REQUEST_INTERVAL = 1.0
+_MAX_CONCURRENT_REQUESTS = 5
+_start_lock = threading.Lock()
+_next_start = 0.0
+
+# Sender IDs: 1-11 ASCII letters, digits, underscores or hyphens
+_SENDER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,11}\Z')
+
+# ISO 3166-1 alpha-2 country codes, checked before any API call is made
+# (plus the user-assigned XK/XV codes used for Kosovo)
+_ISO_ALPHA2 = frozenset((
+    'XK', 'XV',
+    'AD', 'AE', 'AF', 'AG', 'AI', 'AL', 'AM', 'AO', 'AQ', 'AR', 'AS', 'AT', 'AU', 'AW', 'AX', 'AZ',
+    'BA', 'BB', 'BD', 'BE', 'BF', 'BG', 'BH', 'BI', 'BJ', 'BL', 'BM', 'BN', 'BO', 'BQ', 'BR', 'BS',
+    'BT', 'BV', 'BW', 'BY', 'BZ', 'CA', 'CC', 'CD', 'CF', 'CG', 'CH', 'CI', 'CK', 'CL', 'CM', 'CN',
+    'CO', 'CR', 'CU', 'CV', 'CW', 'CX', 'CY', 'CZ', 'DE', 'DJ', 'DK', 'DM', 'DO', 'DZ', 'EC', 'EE',
+    'EG', 'EH', 'ER', 'ES', 'ET', 'FI', 'FJ', 'FK', 'FM', 'FO', 'FR', 'GA', 'GB', 'GD', 'GE', 'GF',
+    'GG', 'GH', 'GI', 'GL', 'GM', 'GN', 'GP', 'GQ', 'GR', 'GS', 'GT', 'GU', 'GW', 'GY', 'HK', 'HM',
+    'HN', 'HR', 'HT', 'HU', 'ID', 'IE', 'IL', 'IM', 'IN', 'IO', 'IQ', 'IR', 'IS', 'IT', 'JE', 'JM',
+    'JO', 'JP', 'KE', 'KG', 'KH', 'KI', 'KM', 'KN', 'KP', 'KR', 'KW', 'KY', 'KZ', 'LA', 'LB', 'LC',
+    'LI', 'LK', 'LR', 'LS', 'LT', 'LU', 'LV', 'LY', 'MA', 'MC', 'MD', 'ME', 'MF', 'MG', 'MH', 'MK',
+    'ML', 'MM', 'MN', 'MO', 'MP', 'MQ', 'MR', 'MS', 'MT', 'MU', 'MV', 'MW', 'MX', 'MY', 'MZ', 'NA',
+    'NC', 'NE', 'NF', 'NG', 'NI', 'NL', 'NO', 'NP', 'NR', 'NU', 'NZ', 'OM', 'PA', 'PE', 'PF', 'PG',
+    'PH', 'PK', 'PL', 'PM', 'PN', 'PR', 'PS', 'PT', 'PW', 'PY', 'QA', 'RE', 'RO', 'RS', 'RU', 'RW',
+    'SA', 'SB', 'SC', 'SD', 'SE', 'SG', 'SH', 'SI', 'SJ', 'SK', 'SL', 'SM', 'SN', 'SO', 'SR', 'SS',
+    'ST', 'SV', 'SX', 'SY', 'SZ', 'TC', 'TD', 'TF', 'TG', 'TH', 'TJ', 'TK', 'TL', 'TM', 'TN', 'TO',
+    'TR', 'TT', 'TV', 'TW', 'TZ', 'UA', 'UG', 'UM', 'US', 'UY', 'UZ', 'VA', 'VC', 'VE', 'VG', 'VI',
+    'VN', 'VU', 'WF', 'WS', 'YE', 'YT', 'ZA', 'ZM', 'ZW'
+))
 
 def validate_input(sender_id: str, countries: List[str]) -> bool:
-    if not 1 <= len(sender_id) <= 11:
-        raise ValueError("Sender ID must be between 1 and 11 characters")
-    
-    if not sender_id.replace('_', '').replace('-', '').isalnum():
+    if not _SENDER_ID_PATTERN.match(sender_id):
+        if not 1 <= len(sender_id) <= 11:
+            raise ValueError("Sender ID must be between 1 and 11 characters")
         raise ValueError("Sender ID can only contain alphanumeric characters, underscore, and hyphen")
     
     if not countries:
         raise ValueError("At least one country code must be provided")
     
+    invalid = [c for c in countries if c.upper() not in _ISO_ALPHA2]
+    if invalid:
+        raise ValueError(f"Invalid ISO 3166-1 alpha-2 country codes: {', '.join(invalid)}")
+    
     return True
 
-def request_sender_id(client, sender_id: str, countries: List[str], message_types: List[str] = None, tags: List[Dict] = None) -> List[Dict]:
+def _wait_for_start_slot() -> None:
+    # Claim the next start time under the lock, then sleep outside it, so
+    # request starts stay spaced however the executor's queue drains
+    global _next_start
+    with _start_lock:
+        now = time.monotonic()
+        start = max(now, _next_start)
+        _next_start = start + _REQUEST_INTERVAL
+    if start > now:
+        time.sleep(start - now)
+
+def _request_one(client, sender_id: str, country: str, index: int, total: int, message_types: List[str], tags: List[Dict] = None) -> Dict:
+    _wait_for_start_slot()
+    print(f"Processing country: {country} ({index}/{total})")
+    
+    request_params = {
+        'ClientToken': os.urandom(16).hex(),  # Idempotency token (up to 64 chars)
+        'SenderId': sender_id,
+        'IsoCountryCode': country.upper(),
+        'MessageTypes': message_types,
+        'DeletionProtectionEnabled': False
+    }
+    
+    if tags:
+        request_params['Tags'] = tags
+    
+    try:
+        # Throttling and transient errors are retried inside this call by the client's retry config
+        response = client.request_sender_id(**request_params)
+        
+        result = {
+            'Country': country,
+            'Status': 'Success',
+            'SenderIdArn': response.get('SenderIdArn'),
+            'MonthlyLeasingPrice': response.get('MonthlyLeasingPrice')
+        }
+        
+    except Exception as e:
+        result = {
+            'Country': country,
+            'Status': 'Failed',
+            'Error': str(e)
+        }
+        
+    print(f"Completed {country}: {result['Status']}")
+    return result
+
+def request_sender_id(client, sender_id: str, countries: List[str], message_types: List[str] = None, tags: List[Dict] = None) -> Tuple[List[Dict], int]:
     if message_types is None:
         message_types = ["TRANSACTIONAL", "PROMOTIONAL"]
     
-    results = []
+    futures = []
+    with ThreadPoolExecutor(max_workers=_MAX_CONCURRENT_REQUESTS) as executor:
+        for i, country in enumerate(countries):
+            futures.append(executor.submit(_request_one, client, sender_id, country, i + 1, len(countries), message_types, tags))
     
-    for i, country in enumerate(countries):
-        if i > 0:
-            time.sleep(1)  # Rate limiting: 1 request per second
-            
-        try:
-            print(f"Processing country: {country} ({i+1}/{len(countries)})")
-            request_params = {
-                'ClientToken': str(uuid.uuid4()),
-                'SenderId': sender_id,
-                'IsoCountryCode': country.upper(),
-                'MessageTypes': message_types,
-                'DeletionProtectionEnabled': False
-            }
-            
-            if tags:
-                request_params['Tags'] = tags
-                
-            response = client.request_sender_id(**request_params)
-            
-            results.append({
-                'Country': country,
-                'Status': 'Success',
-                'SenderIdArn': response.get('SenderIdArn'),
-                'MonthlyLeasingPrice': response.get('MonthlyLeasingPrice')
-            })
-            
-        except Exception as e:
-            results.append({
-                'Country': country,
-                'Status': 'Failed',
-                'Error': str(e)
-            })
-            
-        print(f"Completed {country}: {'Success' if results[-1]['Status'] == 'Success' else 'Failed'}")
+    # Count successes while collecting results, in input order
+    results = []
+    successful = 0
+    for future in futures:
+        result = future.result()
+        results.append(result)
+        if result['Status'] == 'Success':
+            successful += 1
     
-    return results
+    return results, successful
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     try:
@@ -70,21 +144,15 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         # Validate input
         validate_input(sender_id, countries)
         
-        # Initialize the AWS SMS Voice v2 client
-        client = boto3.client('pinpoint-sms-voice-v2')
-        
         # Process the request
-        results = request_sender_id(
-            client=client,
+        results, successful = request_sender_id(
+            client=_SMS_VOICE_CLIENT,
             sender_id=sender_id,
             countries=countries,
             message_types=message_types,
             tags=tags
         )
         
-        # Calculate summary
-        successful = sum(1 for r in results if r['Status'] == 'Success')
-        
         return {
             'statusCode': 200,
             'body': {